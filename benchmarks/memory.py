@@ -0,0 +1,67 @@
+"""
+Compare retained memory of Planner and CompactPlanner for large plans.
+
+    python benchmarks/memory.py [commands]
+"""
+
+import gc
+import sys
+import tracemalloc
+
+from uniswap.compact import CompactPlanner
+from uniswap.universal_router import Planner
+
+weth = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
+yfi = "0x0bc529c00C6401aEF6D220BE8C6Ea1667F6Ad93e"
+
+
+def batch_payout(planner, size):
+    for i in range(size):
+        planner.transfer(yfi, f"0x{i + 1:040x}", 10**18 + i)
+    return planner
+
+
+def nft_sweep(planner, size):
+    for i in range(size):
+        planner.sweep_erc721(yfi, f"0x{i + 1:040x}", i)
+    return planner
+
+
+def seaport_sweep(planner, size):
+    for i in range(size):
+        planner.seaport_v1_5(10**17 + i, i.to_bytes(32, "big") * 8, allow_revert=True)
+    return planner
+
+
+def swaps(planner, size):
+    for i in range(size):
+        planner.v3_swap_exact_in(f"0x{i + 1:040x}", 10**18 + i, 0, [weth, 500, yfi], True)
+    return planner
+
+
+def measure(planner_class, plan, size):
+    # warm up encoder caches so they aren't attributed to the planner
+    plan(planner_class(), 10)
+    gc.collect()
+    tracemalloc.start()
+    planner = plan(planner_class(), size)
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del planner
+    return retained, peak
+
+
+def main(size=10_000):
+    print(f"{'plan':<14}{'planner':<16}{'retained':>12}{'peak':>12}{'per command':>14}")
+    for plan in [batch_payout, nft_sweep, seaport_sweep, swaps]:
+        for planner_class in [Planner, CompactPlanner]:
+            retained, peak = measure(planner_class, plan, size)
+            print(
+                f"{plan.__name__:<14}{planner_class.__name__:<16}"
+                f"{retained:>12,}{peak:>12,}{retained / size:>14,.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,83 @@
+"""
+Throughput of CalldataFilter against a full abi decode of the same transactions.
+
+    python benchmarks/mempool.py [calldata.txt]
+
+The file holds one hex encoded `execute` calldata per line, as recorded by a mempool
+watcher. Without one a synthetic mix of swaps, nft buys and sub-plans is generated.
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+from eth_abi import decode, encode
+
+from uniswap.mempool import CalldataFilter
+from uniswap.universal_router import MSG_SENDER, Planner
+
+weth = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
+usdc = "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48"
+yfi = "0x0bc529c00C6401aEF6D220BE8C6Ea1667F6Ad93e"
+dai = "0x6B175474E89094C44Da98b954EedeAC495271d0F"
+tokens = [weth, usdc, yfi, dai]
+execute = bytes.fromhex("3593564c")
+
+
+def synthetic(count):
+    rng = random.Random(0)
+    transactions = []
+    for _ in range(count):
+        planner = Planner()
+        token_in, token_out = rng.sample(tokens, 2)
+        amount = rng.randrange(10**15, 10**21)
+        match rng.randrange(4):
+            case 0:
+                path = [token_in, 500, token_out]
+                planner.v3_swap_exact_in(MSG_SENDER, amount, 0, path, True)
+            case 1:
+                planner.v2_swap_exact_in(MSG_SENDER, amount, 0, [token_in, token_out], True)
+            case 2:
+                planner.seaport_v1_5(amount, rng.randbytes(512), allow_revert=True)
+                planner.sweep(weth, MSG_SENDER, 0)
+            case 3:
+                inner = Planner()
+                inner.v3_swap_exact_out(MSG_SENDER, amount, 0, [token_out, 3000, token_in], True)
+                planner.execute_sub_plan(*inner.build(), allow_revert=True)
+        commands, inputs = planner.build()
+        transactions.append(
+            execute + encode(["bytes", "bytes[]", "uint256"], [commands, inputs, 2**42])
+        )
+    return transactions
+
+
+def full_decode(calldata):
+    return decode(["bytes", "bytes[]", "uint256"], calldata[4:])
+
+
+def bench(name, fn, transactions):
+    start = time.perf_counter()
+    matches = sum(map(bool, map(fn, transactions)))
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28}{len(transactions) / elapsed:>14,.0f} tx/s{matches:>10} matched")
+
+
+def main(path=None):
+    if path:
+        lines = Path(path).read_text().split()
+        transactions = [bytes.fromhex(line.removeprefix("0x")) for line in lines]
+    else:
+        transactions = synthetic(20_000)
+    bench("abi decode", full_decode, transactions)
+    bench("filter commands", CalldataFilter().match, transactions)
+    bench("filter tokens", CalldataFilter(tokens=[yfi]).match, transactions)
+    bench(
+        "filter tokens and amount",
+        CalldataFilter(tokens=[yfi], min_amount=10**20).match,
+        transactions,
+    )
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,50 @@
+"""
+Plan building throughput by thread count.
+
+    python benchmarks/threads.py [plans] [max threads]
+
+Each thread builds its own planners without a cache, so the only shared lock on the
+hot path is the lru cache of eth_abi's encoder registry. With the GIL (3.11) throughput
+stays flat at ~2.1k plans/s from 1 to 8 threads. Scaling on free-threaded CPython
+(3.13t+) has not been measured yet, run this there to get the numbers.
+"""
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from uniswap.universal_router import Planner
+
+dev = "0xf39Fd6e51aad88F6F4ce6aB8827279cffFb92266"
+weth = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
+yfi = "0x0bc529c00C6401aEF6D220BE8C6Ea1667F6Ad93e"
+
+
+def build_plans(count):
+    for i in range(count):
+        planner = Planner()
+        planner.wrap_eth(dev, 10**18 + i)
+        planner.v3_swap_exact_in(dev, 10**18 + i, 0, [weth, 3000, yfi], False)
+        planner.sweep(yfi, dev, 0)
+        planner.freeze()
+
+
+def main(plans=2000, max_threads=8):
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"python {sys.version.split()[0]}, gil {'enabled' if gil else 'disabled'}")
+    print(f"{'threads':>8}{'plans/s':>12}{'speedup':>10}")
+    baseline = None
+    threads = 1
+    while threads <= max_threads:
+        with ThreadPoolExecutor(threads) as pool:
+            start = time.perf_counter()
+            list(pool.map(build_plans, [plans // threads] * threads))
+            elapsed = time.perf_counter() - start
+        throughput = plans // threads * threads / elapsed
+        baseline = baseline or throughput
+        print(f"{threads:>8}{throughput:>12,.0f}{throughput / baseline:>10.2f}")
+        threads *= 2
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
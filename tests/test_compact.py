@@ -0,0 +1,84 @@
+import gc
+import tracemalloc
+
+import pytest
+from eth_abi.exceptions import EncodingError
+
+from uniswap.compact import CompactPlanner
+from uniswap.universal_router import Command, Planner, PlannerCommands
+
+dev = "0xf39Fd6e51aad88F6F4ce6aB8827279cffFb92266"
+weth = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
+yfi = "0x0bc529c00C6401aEF6D220BE8C6Ea1667F6Ad93e"
+amount = 10**18
+data = b"hentai is art"
+
+
+def fill(planner):
+    planner.wrap_eth(dev, amount)
+    planner.v3_swap_exact_in(dev, amount, 0, [weth, 10000, yfi], False)
+    planner.sweep(yfi, dev, 1234)
+    planner.cryptopunks(1234, dev, amount)
+    planner.owner_check_1155(dev, yfi, 1234, 1)
+    planner.seaport_v1_5(amount, data, allow_revert=True)
+    planner.approve_erc20(yfi, 1)
+    planner.v2_swap_exact_out(dev, amount, amount, [weth, yfi], True)
+    planner.x2y2_1155(amount, data, dev, yfi, 1234, 2)
+    planner.permit2_permit([(yfi, amount, 2**42, 1), dev, 2**42], data)
+    return planner
+
+
+def test_build():
+    compact = fill(CompactPlanner())
+    planner = fill(Planner())
+    assert len(compact) == len(planner.commands)
+    assert compact.build() == planner.build()
+
+
+def test_inputs():
+    compact = fill(CompactPlanner())
+    assert compact.inputs[0] == (dev.lower(), amount)
+    assert compact.inputs[1] == (dev.lower(), amount, 0, [weth, 10000, yfi], False)
+    assert compact.inputs[5] == (amount, data)
+    assert compact.inputs[3] == (1234, dev.lower(), amount)
+
+
+def test_planner_commands_is_abstract():
+    with pytest.raises(TypeError):
+        PlannerCommands()
+
+
+def test_revert():
+    with pytest.raises(ValueError, match="WRAP_ETH cannot be allowed to revert"):
+        CompactPlanner().add(Command.WRAP_ETH, dev, amount, allow_revert=True)
+
+
+def test_rejected_add():
+    compact = fill(CompactPlanner())
+    before = compact.build()
+    with pytest.raises(NotImplementedError):
+        compact.v3_swap_exact_in(dev, amount, 0, [weth, 10000, yfi], "nope")
+    with pytest.raises(EncodingError):
+        compact.sweep(yfi, dev[:-1], 1234)
+    assert compact.build() == before
+    # eth_abi accepts the uppercase prefix, so the buffers have to as well
+    compact.sweep("0X" + yfi[2:], dev, 1234)
+    planner = fill(Planner())
+    planner.sweep(yfi, dev, 1234)
+    assert compact.build() == planner.build()
+
+
+def test_memory():
+    def measure(planner_class):
+        planner_class().transfer(yfi, dev, amount)
+        gc.collect()
+        tracemalloc.start()
+        planner = planner_class()
+        for i in range(1000):
+            planner.transfer(yfi, f"0x{i + 1:040x}", amount + i)
+        gc.collect()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return size
+
+    assert measure(CompactPlanner) < 0.6 * measure(Planner)
@@ -0,0 +1,134 @@
+import json
+from collections import Counter
+
+import pytest
+from eth_abi import encode
+
+from uniswap.gas import (
+    ALLOW_REVERT,
+    EXECUTE_WITH_DEADLINE,
+    PERMIT,
+    UNKNOWN_COMMAND,
+    V2_HOP,
+    V3_HOP,
+    GasModel,
+    Receipt,
+    calldata_gas,
+    decode_execute,
+    load_receipts,
+    plan_features,
+)
+from uniswap.universal_router import Command, Planner
+
+dev = "0xf39Fd6e51aad88F6F4ce6aB8827279cffFb92266"
+weth = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
+yfi = "0x0bc529c00C6401aEF6D220BE8C6Ea1667F6Ad93e"
+usdc = "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48"
+amount = 10**18
+deadline = 2**42
+data = b"hentai is art"
+
+
+def make_planner():
+    planner = Planner()
+    planner.wrap_eth(dev, amount)
+    planner.v3_swap_exact_in(dev, amount, 0, [weth, 500, usdc, 3000, yfi], False)
+    planner.v2_swap_exact_in(dev, amount, 0, [weth, usdc, yfi], False)
+    permit_single = [(yfi, amount, deadline, 1), dev, deadline]
+    planner.permit2_permit(permit_single, data)
+    details = [(yfi, amount, deadline, 1), (weth, amount, deadline, 1)]
+    planner.permit2_permit_batch([details, dev, deadline], data)
+    planner.seaport_v1_5(amount, data, allow_revert=True)
+    return planner
+
+
+def test_calldata_gas():
+    commands, inputs = make_planner().build()
+    payload = EXECUTE_WITH_DEADLINE + encode(
+        ["bytes", "bytes[]", "uint256"], [commands, inputs, deadline]
+    )
+    zeros = payload.count(0)
+    assert calldata_gas(commands, inputs, deadline) == zeros * 4 + (len(payload) - zeros) * 16
+
+
+def test_plan_features():
+    commands, inputs = make_planner().build()
+    features = plan_features(commands, inputs)
+    assert features[V3_HOP] == 2
+    assert features[V2_HOP] == 2
+    assert features[PERMIT] == 3
+    assert features[ALLOW_REVERT] == 1
+    assert features[Command.SEAPORT_V1_5] == 1
+
+
+def test_plan_features_sub_plan():
+    sub_plan = make_planner()
+    planner = Planner()
+    planner.execute_sub_plan(*sub_plan.build(), allow_revert=True)
+    commands, inputs = planner.build()
+    features = plan_features(commands, inputs)
+    assert features[Command.EXECUTE_SUB_PLAN] == 1
+    assert features[ALLOW_REVERT] == 2
+    assert features[V3_HOP] == 2
+
+
+def test_estimate_bounds():
+    estimate = GasModel().estimate_plan(make_planner())
+    assert estimate.low < estimate.gas < estimate.high
+
+
+def test_calibrate(tmp_path):
+    truth = GasModel(overhead=8_000, extra={**GasModel().extra, V3_HOP: 90_000}, error=0)
+    records = []
+    for hops in range(1, 4):
+        planner = Planner()
+        path = [weth] + [500, yfi] * hops
+        planner.v3_swap_exact_in(dev, amount * hops, 0, path, False)
+        planner.sweep(yfi, dev, 0)
+        commands, inputs = planner.build()
+        payload = EXECUTE_WITH_DEADLINE + encode(
+            ["bytes", "bytes[]", "uint256"], [commands, inputs, deadline]
+        )
+        gas_used = truth.estimate(commands, inputs, deadline).gas
+        records.append({"input": "0x" + payload.hex(), "gasUsed": hex(gas_used)})
+    path = tmp_path / "receipts.json"
+    path.write_text(json.dumps(records))
+
+    receipts = load_receipts(path)
+    model = GasModel().calibrate(receipts, strength=1e-6)
+    for receipt in receipts:
+        estimate = model.estimate(receipt.commands, receipt.inputs, receipt.deadline)
+        assert abs(estimate.gas - receipt.gas_used) < 10
+    assert model.extra[V3_HOP] == 90_000
+    assert model.error < 1e-3
+
+
+def test_unknown_command():
+    commands, inputs = make_planner().build()
+    commands += bytes([0x07, 0x23 | Command.FLAG_ALLOW_REVERT, 0x3F])
+    inputs += [b"", bytes(64), bytes(32)]
+    features = plan_features(commands, inputs)
+    assert features[UNKNOWN_COMMAND] == 3
+    assert Command.COMMAND_TYPE_MASK not in features
+    assert features[ALLOW_REVERT] == 2
+    model = GasModel()
+    payload = EXECUTE_WITH_DEADLINE + encode(
+        ["bytes", "bytes[]", "uint256"], [commands, inputs, deadline]
+    )
+    receipts = [Receipt(commands, inputs, deadline, 10**6)]
+    calibrated = model.calibrate(receipts)
+    assert calibrated.extra[UNKNOWN_COMMAND] != model.extra[UNKNOWN_COMMAND]
+    assert calibrated.estimate(commands, inputs).gas > model.estimate(b"", []).gas
+    assert GasModel().estimate(bytes([0x3F]), [bytes(32)]).gas > 0
+    assert decode_execute(payload) == (commands, inputs, deadline)
+
+
+def test_custom_base_table():
+    model = GasModel(base={Command.WRAP_ETH: 30_000})
+    features = Counter({Command.WRAP_ETH: 1, Command.SWEEP: 2})
+    assert model.execution_gas(features) == model.overhead + 30_000 + 2 * 50_000
+
+
+def test_calibrate_strength():
+    with pytest.raises(ValueError, match="strength must be positive"):
+        GasModel().calibrate([], strength=0)
@@ -0,0 +1,107 @@
+import pytest
+from eth_abi import encode
+
+from uniswap.mempool import CalldataFilter, iter_commands
+from uniswap.universal_router import Command, Planner
+
+dev = "0xf39Fd6e51aad88F6F4ce6aB8827279cffFb92266"
+weth = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
+yfi = "0x0bc529c00C6401aEF6D220BE8C6Ea1667F6Ad93e"
+usdc = "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48"
+dai = "0x6B175474E89094C44Da98b954EedeAC495271d0F"
+execute = bytes.fromhex("3593564c")
+
+
+def calldata(planner):
+    commands, inputs = planner.build()
+    return execute + encode(["bytes", "bytes[]", "uint256"], [commands, inputs, 2**42])
+
+
+def v3_swap(path, amount=10**18):
+    planner = Planner()
+    planner.wrap_eth(dev, amount)
+    planner.v3_swap_exact_in(dev, amount, 0, path, False)
+    return calldata(planner)
+
+
+def v2_swap(path, amount=10**18):
+    planner = Planner()
+    planner.v2_swap_exact_out(dev, amount, 0, path, True)
+    planner.sweep(path[-1], dev, 0)
+    return calldata(planner)
+
+
+def sub_plan(inner):
+    planner = Planner()
+    planner.execute_sub_plan(*inner.build(), allow_revert=True)
+    return calldata(planner)
+
+
+def test_iter_commands():
+    planner = Planner()
+    planner.wrap_eth(dev, 1)
+    planner.sweep(yfi, dev, 0)
+    commands, inputs = planner.build()
+    view = memoryview(calldata(planner))[4:]
+    assert [(command, bytes(data)) for command, data in iter_commands(view)] == list(
+        zip(commands, inputs)
+    )
+
+
+@pytest.mark.parametrize(
+    "predicate, matches",
+    [
+        (CalldataFilter(), [True, True, False, True]),
+        (CalldataFilter([Command.V3_SWAP_EXACT_IN]), [True, False, False, True]),
+        (CalldataFilter([Command.SWEEP]), [False, True, True, False]),
+        (CalldataFilter(tokens=[dai]), [False, False, False, False]),
+        (CalldataFilter(tokens=[usdc]), [True, True, False, True]),
+        (CalldataFilter(tokens=[yfi.lower()]), [True, True, False, False]),
+        (CalldataFilter(min_amount=10**18), [True, False, False, True]),
+        (CalldataFilter(tokens=[yfi], min_amount=10**17), [True, True, False, False]),
+        (CalldataFilter([Command.V2_SWAP_EXACT_OUT], tokens=[yfi]), [False, True, False, False]),
+        (CalldataFilter([Command.SWEEP], tokens=[yfi]), [False, True, True, False]),
+        (CalldataFilter([Command.SWEEP], tokens=[usdc]), [False, False, False, False]),
+        (CalldataFilter([Command.SWEEP], min_amount=1), [False, False, True, False]),
+        (
+            CalldataFilter([Command.WRAP_ETH, Command.SWEEP], tokens=[yfi]),
+            [False, True, True, False],
+        ),
+    ],
+)
+def test_filter(predicate, matches):
+    sweep = Planner()
+    sweep.sweep(yfi, dev, 1)
+    transactions = [
+        v3_swap([weth, 500, usdc, 3000, yfi]),
+        v2_swap([weth, usdc, yfi], amount=10**17),
+        calldata(sweep),
+        v3_swap([weth, 500, usdc]),
+    ]
+    assert [predicate.match(tx) for tx in transactions] == matches
+    assert list(predicate.stream(transactions)) == [
+        tx for tx, match in zip(transactions, matches) if match
+    ]
+
+
+def test_filter_sub_plan():
+    inner = Planner()
+    inner.v3_swap_exact_in(dev, 10**18, 0, [weth, 500, yfi], False)
+    tx = sub_plan(inner)
+    assert CalldataFilter().match(tx)
+    assert CalldataFilter(tokens=[yfi]).match(tx)
+    assert not CalldataFilter(tokens=[usdc]).match(tx)
+
+
+def test_filter_garbage():
+    predicate = CalldataFilter(tokens=[yfi])
+    assert not predicate.match(b"")
+    assert not predicate.match(bytes.fromhex("a9059cbb") + bytes(64))
+    assert not predicate.match(execute + b"\xff" * 200)
+
+
+def test_filter_unsatisfiable():
+    with pytest.raises(ValueError, match="no command can match"):
+        CalldataFilter([Command.WRAP_ETH], tokens=[weth])
+    with pytest.raises(ValueError, match="no command can match"):
+        CalldataFilter([Command.PAY_PORTION], min_amount=1)
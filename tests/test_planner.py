@@ -1,5 +1,12 @@
+import gc
+import sys
+import tracemalloc
+from decimal import Decimal
+
 import pytest
-from uniswap.universal_router import Command, Planner
+
+from uniswap.cache import LRUCache, sizeof
+from uniswap.universal_router import Command, Planner, encode_command
 
 dev = "0xf39Fd6e51aad88F6F4ce6aB8827279cffFb92266"
 amount = 10**18
@@ -26,3 +33,82 @@ def test_revert():
     planner = Planner()
     with pytest.raises(ValueError, match="WRAP_ETH cannot be allowed to revert"):
         planner.add(Command.WRAP_ETH, dev, amount, allow_revert=True)
+
+
+def test_allow_revert():
+    planner = Planner()
+    planner.add(Command.SEAPORT_V1_5, amount, b"", allow_revert=True)
+    commands, inputs = planner.build()
+    assert commands == bytes.fromhex("90")
+    assert inputs == [encode_command(Command.SEAPORT_V1_5, amount, b"")]
+
+
+def test_cache():
+    cache = LRUCache()
+    for _ in range(3):
+        planner = Planner(cache=cache)
+        planner.wrap_eth(dev, amount)
+        planner.v2_swap_exact_in(dev, amount, 0, [dev, dev], True)
+        commands, inputs = planner.build()
+        uncached = Planner(commands=planner.commands, inputs=planner.inputs)
+        assert (commands, inputs) == uncached.build()
+    stats = cache.stats()
+    assert stats.entries == 3
+    assert stats.misses == 3
+    assert stats.hits == 8
+    assert stats.size > len(commands) + 2 * sum(map(len, inputs))
+
+
+def test_cache_key_types():
+    cache = LRUCache()
+    planner = Planner(cache=cache)
+    planner.v2_swap_exact_in(dev, amount, 0, [dev, dev], True)
+    with pytest.raises(NotImplementedError):
+        planner.v2_swap_exact_in(dev, amount, 0, [dev, dev], 1)
+    planner.sweep(dev, dev, 1)
+    with pytest.raises(NotImplementedError):
+        planner.sweep(dev, dev, 1.0)
+    with pytest.raises(NotImplementedError):
+        planner.sweep(dev, dev, Decimal(1))
+    planner.seaport_v1_5(amount, b"data")
+    with pytest.raises(NotImplementedError):
+        planner.seaport_v1_5(amount, memoryview(b"data"))
+    assert len(planner.commands) == 3
+
+
+def test_cache_eviction():
+    sizing = LRUCache()
+    Planner(cache=sizing).wrap_eth(dev, 1)
+    cache = LRUCache(max_bytes=sizing.stats().size * 3 // 2)
+    planner = Planner(cache=cache)
+    planner.wrap_eth(dev, 1)
+    planner.wrap_eth(dev, 2)
+    planner.wrap_eth(dev, 1)
+    stats = cache.stats()
+    assert stats.entries == 1
+    assert stats.evictions == 2
+    assert stats.hit_rate == 0
+
+
+def test_cache_size_covers_memory():
+    Planner(cache=LRUCache()).transfer(dev, dev, amount)
+    gc.collect()
+    tracemalloc.start()
+    cache = LRUCache(max_entries=10**6, max_bytes=2**40)
+    for i in range(2000):
+        planner = Planner(cache=cache)
+        planner.transfer(dev, f"0x{i + 1:040x}", amount + i)
+        planner.build()
+    del planner
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert retained < cache.stats().size < 2 * retained
+
+
+def test_sizeof():
+    data = b"x" * 100
+    assert sizeof(data) > 100
+    assert sizeof((data, [data, {"a": data}])) > sizeof(data) + sizeof([]) + sizeof({})
+    # type tags in frozen keys are shared, they don't count
+    assert sizeof((list, data)) == sizeof((None, data)) - sys.getsizeof(None)
@@ -0,0 +1,144 @@
+import json
+
+import pytest
+from eth_abi import encode
+from eth_abi.exceptions import EncodingError
+
+from uniswap import universal_router
+from uniswap.compact import CompactPlanner
+from uniswap.registry import load_registry
+from uniswap.universal_router import (
+    Address,
+    Command,
+    PermitDetails,
+    PermitSingle,
+    Planner,
+    encode_command,
+)
+
+yfi = "0x0bc529c00C6401aEF6D220BE8C6Ea1667F6Ad93e"
+constants = {
+    "1": {
+        "weth": "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2",
+        "permit2": "0x000000000022D473030F116dDEe9F6B43aC78BA3",
+        "router": "0x3fC91A3afd70395Cd496C647d5a6CC9D4B2b7FAD",
+    },
+    "10": {
+        "weth": "0x4200000000000000000000000000000000000006",
+        "permit2": "0x000000000022D473030F116dDEe9F6B43aC78BA3",
+        "router": "0xCb1355ff08Ab38bBCE60111F1bb2B784bE25D7e8",
+    },
+}
+
+
+@pytest.fixture
+def registry(tmp_path):
+    path = tmp_path / "registry.json"
+    path.write_text(json.dumps(constants))
+    return load_registry(path)
+
+
+def test_load_registry(registry):
+    assert set(registry) == {1, 10}
+    assert registry[10].weth == constants["10"]["weth"]
+    assert registry[1].weth.word == bytes(12) + bytes.fromhex(constants["1"]["weth"][2:])
+    assert registry[1].msg_sender.word == (1).to_bytes(32, "big")
+    assert registry[1].address_this.word == (2).to_bytes(32, "big")
+
+
+@pytest.mark.parametrize(
+    "value",
+    ["0x1234", " " + yfi, yfi[:10] + " " + yfi[10:], "0x" + "zz" * 20],
+)
+def test_invalid_address(value):
+    # rejected exactly when the abi encoder rejects the str
+    with pytest.raises(EncodingError):
+        encode(["address"], [value])
+    with pytest.raises(ValueError):
+        Address(value)
+
+
+@pytest.mark.parametrize("value", [yfi, yfi.lower(), "0X" + yfi[2:], yfi[2:], yfi[:-1] + "F"])
+def test_address_word(value):
+    assert Address(value).word == encode(["address"], [value])
+
+
+@pytest.mark.parametrize("planner_class", [Planner, CompactPlanner])
+def test_planner_helpers(registry, planner_class):
+    chain = registry[1]
+    planner = planner_class()
+    planner.wrap_eth(chain.address_this, 10**18)
+    planner.sweep(chain.weth, chain.msg_sender, 0)
+    planner.permit2_permit([(yfi, 10**18, 2**42, 1), chain.router, 2**42], b"")
+    planner.approve_erc20(yfi, 1)
+
+    reference = Planner()
+    reference.wrap_eth(str(chain.address_this), 10**18)
+    reference.sweep(str(chain.weth), str(chain.msg_sender), 0)
+    reference.permit2_permit([(yfi, 10**18, 2**42, 1), str(chain.router), 2**42], b"")
+    reference.approve_erc20(yfi, 1)
+    assert planner.build() == reference.build()
+
+
+def test_encode_static_falls_back(registry):
+    weth = registry[1].weth
+    # out of range values are still rejected by the abi encoder
+    with pytest.raises(EncodingError):
+        encode_command(Command.PERMIT2_TRANSFER_FROM, weth, weth, 2**160)
+    with pytest.raises(NotImplementedError):
+        encode_command(Command.SWEEP, weth, weth)
+
+
+@pytest.mark.parametrize(
+    "make_permit",
+    [
+        lambda chain: {
+            "details": {"token": chain.weth, "amount": 10**18, "expiration": 2**42, "nonce": 1},
+            "spender": chain.router,
+            "sigDeadline": 2**42,
+        },
+        lambda chain: [(chain.weth, 10**18, 2**42, 1), chain.router, 2**42],
+        lambda chain: PermitSingle(
+            PermitDetails(chain.weth, 10**18, 2**42, 1), chain.router, 2**42
+        ),
+    ],
+)
+def test_permit2_permit_fast_path(registry, make_permit, monkeypatch):
+    chain = registry[1]
+    signature = b"signature" * 10
+    strings = [(str(chain.weth), 10**18, 2**42, 1), str(chain.router), 2**42]
+    reference = encode_command(Command.PERMIT2_PERMIT, strings, signature)
+    # the adapter is skipped entirely when every address is a handle
+    monkeypatch.setattr(universal_router, "permit_single_adapter", None)
+    assert encode_command(Command.PERMIT2_PERMIT, make_permit(chain), signature) == reference
+
+
+@pytest.mark.parametrize(
+    "make_permit",
+    [
+        lambda chain: {
+            "details": [
+                {"token": chain.weth, "amount": 10**18, "expiration": 2**42, "nonce": 1},
+                {"token": chain.permit2, "amount": 2, "expiration": 3, "nonce": 4},
+            ],
+            "spender": chain.router,
+            "sigDeadline": 2**42,
+        },
+        lambda chain: [
+            [(chain.weth, 10**18, 2**42, 1), (chain.permit2, 2, 3, 4)],
+            chain.router,
+            2**42,
+        ],
+        lambda chain: [[], chain.router, 2**42],
+    ],
+)
+def test_permit2_permit_batch_fast_path(registry, make_permit, monkeypatch):
+    chain = registry[1]
+    signature = b"signature" * 10
+    permit = make_permit(chain)
+    reference = encode(
+        ["((address,uint160,uint48,uint48)[],address,uint256)", "bytes"],
+        [universal_router.permit_batch_adapter.validate_python(permit), signature],
+    )
+    monkeypatch.setattr(universal_router, "permit_batch_adapter", None)
+    assert encode_command(Command.PERMIT2_PERMIT_BATCH, permit, signature) == reference
@@ -0,0 +1,110 @@
+import copy
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+
+import pytest
+
+from uniswap.cache import LRUCache
+from uniswap.compact import CompactPlanner
+from uniswap.universal_router import (
+    Command,
+    Plan,
+    Planner,
+    encode_command,
+    permit_batch_adapter,
+    permit_single_adapter,
+    transfer_from_batch_adapter,
+)
+
+dev = "0xf39Fd6e51aad88F6F4ce6aB8827279cffFb92266"
+yfi = "0x0bc529c00C6401aEF6D220BE8C6Ea1667F6Ad93e"
+permit_batch = [[(yfi, 10**18, 2**42, 1)], dev, 2**42]
+threads = 8
+per_thread = 200
+
+
+def worker(planner, thread):
+    for i in range(per_thread):
+        amount = thread * per_thread + i
+        if i % 2:
+            planner.wrap_eth(dev, amount)
+        else:
+            planner.sweep(yfi, dev, amount)
+        if i % 50 == 0:
+            planner.permit2_permit_batch(permit_batch, b"")
+            planner.build()
+
+
+@pytest.mark.parametrize("planner", [Planner(), Planner(cache=LRUCache()), CompactPlanner()])
+def test_shared_planner(planner):
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(worker, [planner] * threads, range(threads)))
+
+    commands, inputs = planner.build()
+    assert len(commands) == len(inputs) == threads * (per_thread + per_thread // 50)
+    amounts = set()
+    for command, data in zip(commands, inputs):
+        if command == Command.PERMIT2_PERMIT_BATCH:
+            assert data == encode_command(command, permit_batch, b"")
+            continue
+        amount = int.from_bytes(data[-32:], "big")
+        if command == Command.WRAP_ETH:
+            assert data == encode_command(command, dev, amount)
+        else:
+            assert data == encode_command(command, yfi, dev, amount)
+        amounts.add(amount)
+    assert amounts == set(range(threads * per_thread))
+
+
+def test_freeze():
+    planner = Planner()
+    planner.wrap_eth(dev, 1)
+    plan = planner.freeze()
+    planner.wrap_eth(dev, 2)
+    assert isinstance(plan, Plan)
+    assert plan == (bytes([Command.WRAP_ETH]), (encode_command(Command.WRAP_ETH, dev, 1),))
+    assert hash(plan) == hash(Plan(*plan))
+    assert CompactPlanner().add(Command.WRAP_ETH, dev, 1).freeze() == plan
+
+
+def test_adapters_concurrent():
+    barrier = Barrier(threads)
+    cases = [
+        (permit_batch_adapter, permit_batch),
+        (permit_single_adapter, {"details": permit_batch[0][0], "spender": dev, "sigDeadline": 1}),
+        (transfer_from_batch_adapter, [{"owner": dev, "to": yfi, "amount": 1, "token": yfi}]),
+    ]
+    expected = [adapter.validate_python(value) for adapter, value in cases]
+
+    def validate(_):
+        barrier.wait()
+        return [
+            [adapter.validate_python(value) for adapter, value in cases] for _ in range(per_thread)
+        ]
+
+    with ThreadPoolExecutor(threads) as pool:
+        for results in pool.map(validate, range(threads)):
+            assert all(result == expected for result in results)
+
+
+@pytest.mark.parametrize("planner_class", [Planner, CompactPlanner])
+def test_copy_and_pickle(planner_class):
+    planner = planner_class()
+    planner.wrap_eth(dev, 1)
+    planner.permit2_permit_batch(permit_batch, b"")
+    plan = planner.freeze()
+    for clone in [pickle.loads(pickle.dumps(planner)), copy.deepcopy(planner)]:
+        assert clone.freeze() == plan
+        assert clone._lock is not planner._lock
+        clone.sweep(yfi, dev, 0)
+        assert planner.freeze() == plan
+    assert copy.copy(planner)._lock is not planner._lock
+
+
+def test_model_copy():
+    planner = Planner()
+    planner.wrap_eth(dev, 1)
+    for clone in [planner.model_copy(), planner.model_copy(deep=True)]:
+        assert clone.build() == planner.build()
+        assert clone._lock is not planner._lock
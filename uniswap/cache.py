@@ -0,0 +1,96 @@
+import sys
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from threading import Lock
+from typing import Any, NamedTuple
+
+# OrderedDict slot and link node plus the (value, size) entry tuple
+ENTRY_OVERHEAD = 200
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def sizeof(value: Any) -> int:
+    """
+    Approximate memory held by a value, walking tuples, lists and dicts.
+    Objects shared with other entries are counted in each of them.
+    """
+    seen = set()
+    stack = [value]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if isinstance(item, type) or id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, (tuple, list)):
+            stack.extend(item)
+        elif isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+    return total
+
+
+class LRUCache:
+    """
+    Bounded least-recently-used cache, safe to share between threads.
+    `max_bytes` caps the estimated memory of keys, values and per-entry bookkeeping.
+    """
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 16 * 2**20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._lock = Lock()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable, compute: Callable[[], Any]):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+            self._misses += 1
+
+        # compute outside the lock, concurrent misses on the same key just race to insert
+        value = compute()
+        value_size = sizeof(key) + sizeof(value) + ENTRY_OVERHEAD
+        if value_size > self.max_bytes:
+            return value
+
+        with self._lock:
+            if key in self._data:
+                self._size -= self._data.pop(key)[1]
+            self._data[key] = value, value_size
+            self._size += value_size
+            while len(self._data) > self.max_entries or self._size > self.max_bytes:
+                self._size -= self._data.popitem(last=False)[1][1]
+                self._evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._size = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                self._hits, self._misses, self._evictions, len(self._data), self._size
+            )
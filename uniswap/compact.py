@@ -0,0 +1,167 @@
+from threading import Lock
+
+from eth_utils import to_canonical_address
+
+from uniswap.universal_router import (
+    REVERTIBLE_COMMANDS,
+    STATIC_TYPES,
+    Address,
+    Command,
+    Plan,
+    PlannerCommands,
+    encode_command,
+)
+
+ADDRESS_PADDING = bytes(12)
+OBJECT = "object"
+
+NFT_ORDER = ("uint256", OBJECT)
+NFT_ORDER_721 = ("uint256", OBJECT, "address", "address", "uint256")
+SWAP = ("address", "uint256", "uint256", OBJECT, "bool")
+
+# commands with dynamic args, their fixed-width head args go into the flat buffers
+# and only the dynamic ones (paths, order data) are kept as objects
+DYNAMIC_TYPES = {
+    Command.V3_SWAP_EXACT_IN: SWAP,
+    Command.V3_SWAP_EXACT_OUT: SWAP,
+    Command.V2_SWAP_EXACT_IN: SWAP,
+    Command.V2_SWAP_EXACT_OUT: SWAP,
+    Command.SEAPORT_V1_5: NFT_ORDER,
+    Command.SEAPORT_V1_4: NFT_ORDER,
+    Command.LOOKS_RARE_V2: NFT_ORDER,
+    Command.NFTX: NFT_ORDER,
+    Command.ELEMENT_MARKET: NFT_ORDER,
+    Command.SUDOSWAP: NFT_ORDER,
+    Command.NFT20: NFT_ORDER,
+    Command.X2Y2_721: NFT_ORDER_721,
+    Command.FOUNDATION: NFT_ORDER_721,
+    Command.X2Y2_1155: (*NFT_ORDER_721, "uint256"),
+}
+
+
+class CompactPlanner(PlannerCommands):
+    """
+    Planner for very large plans, stores args in flat buffers instead of python objects.
+
+    Commands go into a bytearray, addresses into one buffer as 20-byte slices and integers
+    into another as 32-byte words, since uint256 doesn't fit `array` typecodes. Static
+    commands build from buffer slices without the abi encoder. Swaps and nft orders keep
+    only their path or order data as an object, permits and sub-plans keep their args tuple.
+    """
+
+    def __init__(self):
+        self.commands = bytearray()
+        self.addresses = bytearray()
+        self.words = bytearray()
+        self.objects: list = []
+        self._lock = Lock()
+
+    # locks can't be copied or pickled, copies get a fresh one
+    def __getstate__(self):
+        return {k: v for k, v in self.__dict__.items() if k != "_lock"}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self.commands)
+
+    def add(self, command: Command, *args, allow_revert=False):
+        if allow_revert:
+            if command not in REVERTIBLE_COMMANDS:
+                raise ValueError(f"{command.name} cannot be allowed to revert")
+            command |= Command.FLAG_ALLOW_REVERT
+
+        # check it's encodeable
+        command_type = command & Command.COMMAND_TYPE_MASK
+        encode_command(command_type, *args)
+        types = STATIC_TYPES.get(command_type) or DYNAMIC_TYPES.get(command_type)
+        # convert into local buffers first so a rejected arg leaves the planner aligned
+        addresses, words, objects = bytearray(), bytearray(), []
+        if types is None:
+            objects.append(args)
+        else:
+            for type, arg in zip(types, args):
+                if isinstance(arg, Address):
+                    addresses += arg.word[12:]
+                elif type == "address":
+                    addresses += to_canonical_address(arg)
+                elif type == OBJECT:
+                    objects.append(arg)
+                else:
+                    words += arg.to_bytes(32, "big")
+        with self._lock:
+            self.addresses += addresses
+            self.words += words
+            self.objects += objects
+            self.commands.append(command)
+        return self
+
+    def _iter_args(self):
+        # yields the command with either its static words or its args tuple
+        address_offset = word_offset = object_offset = 0
+        addresses, words = memoryview(self.addresses), memoryview(self.words)
+        for command in self.commands:
+            command_type = command & Command.COMMAND_TYPE_MASK
+            types = STATIC_TYPES.get(command_type)
+            if types is None and (types := DYNAMIC_TYPES.get(command_type)) is not None:
+                args = []
+                for type in types:
+                    if type == "address":
+                        address = addresses[address_offset : address_offset + 20]
+                        args.append("0x" + address.hex())
+                        address_offset += 20
+                    elif type == OBJECT:
+                        args.append(self.objects[object_offset])
+                        object_offset += 1
+                    else:
+                        value = int.from_bytes(words[word_offset : word_offset + 32], "big")
+                        args.append(bool(value) if type == "bool" else value)
+                        word_offset += 32
+                yield command_type, None, tuple(args)
+                continue
+            if types is None:
+                yield command_type, None, self.objects[object_offset]
+                object_offset += 1
+                continue
+            parts = []
+            for type in types:
+                if type == "address":
+                    parts.append(ADDRESS_PADDING)
+                    parts.append(addresses[address_offset : address_offset + 20])
+                    address_offset += 20
+                else:
+                    parts.append(words[word_offset : word_offset + 32])
+                    word_offset += 32
+            yield command_type, parts, None
+
+    @property
+    def inputs(self) -> list[tuple]:
+        inputs = []
+        with self._lock:
+            for command_type, parts, args in self._iter_args():
+                if parts is None:
+                    inputs.append(args)
+                    continue
+                words = b"".join(parts)
+                args = tuple(
+                    "0x" + words[i * 32 + 12 : i * 32 + 32].hex()
+                    if type == "address"
+                    else int.from_bytes(words[i * 32 : i * 32 + 32], "big")
+                    for i, type in enumerate(STATIC_TYPES[command_type])
+                )
+                inputs.append(args)
+        return inputs
+
+    def build(self) -> tuple[bytes, list[bytes]]:
+        with self._lock:
+            inputs = [
+                encode_command(command_type, *args) if parts is None else b"".join(parts)
+                for command_type, parts, args in self._iter_args()
+            ]
+            return bytes(self.commands), inputs
+
+    def freeze(self) -> Plan:
+        commands, inputs = self.build()
+        return Plan(commands, tuple(inputs))
@@ -0,0 +1,300 @@
+import json
+from collections import Counter
+from pathlib import Path
+from typing import NamedTuple
+
+from eth_abi import decode
+from pydantic import BaseModel
+
+from uniswap.universal_router import Command, Planner
+
+# https://github.com/Uniswap/universal-router/blob/main/contracts/UniversalRouter.sol
+EXECUTE_WITH_DEADLINE = bytes.fromhex("3593564c")  # execute(bytes,bytes[],uint256)
+EXECUTE = bytes.fromhex("24856bc3")  # execute(bytes,bytes[])
+
+# https://eips.ethereum.org/EIPS/eip-2028
+TX_BASE_GAS = 21000
+CALLDATA_ZERO_GAS = 4
+CALLDATA_NONZERO_GAS = 16
+
+# features priced on top of the per-command base cost
+V2_HOP = "v2_hop"
+V3_HOP = "v3_hop"
+PERMIT = "permit"
+BATCH_TRANSFER = "batch_transfer"
+ALLOW_REVERT = "allow_revert"
+# command bytes the enum doesn't define yet, e.g. from newer router deployments
+UNKNOWN_COMMAND = "unknown_command"
+EXTRA_FEATURES = [V2_HOP, V3_HOP, PERMIT, BATCH_TRANSFER, ALLOW_REVERT, UNKNOWN_COMMAND]
+
+# rough mainnet figures, run `GasModel.calibrate` against your own receipts for better ones
+DEFAULT_BASE = {
+    Command.V3_SWAP_EXACT_IN: 25_000,
+    Command.V3_SWAP_EXACT_OUT: 30_000,
+    Command.PERMIT2_TRANSFER_FROM: 30_000,
+    Command.PERMIT2_PERMIT_BATCH: 10_000,
+    Command.SWEEP: 12_000,
+    Command.TRANSFER: 30_000,
+    Command.PAY_PORTION: 35_000,
+    Command.V2_SWAP_EXACT_IN: 20_000,
+    Command.V2_SWAP_EXACT_OUT: 25_000,
+    Command.PERMIT2_PERMIT: 5_000,
+    Command.WRAP_ETH: 30_000,
+    Command.UNWRAP_WETH: 15_000,
+    Command.PERMIT2_TRANSFER_FROM_BATCH: 10_000,
+    Command.BALANCE_CHECK_ERC20: 5_000,
+    Command.SEAPORT_V1_5: 150_000,
+    Command.LOOKS_RARE_V2: 160_000,
+    Command.NFTX: 200_000,
+    Command.CRYPTOPUNKS: 60_000,
+    Command.OWNER_CHECK_721: 5_000,
+    Command.OWNER_CHECK_1155: 5_000,
+    Command.SWEEP_ERC721: 40_000,
+    Command.X2Y2_721: 200_000,
+    Command.SUDOSWAP: 150_000,
+    Command.NFT20: 150_000,
+    Command.X2Y2_1155: 200_000,
+    Command.FOUNDATION: 120_000,
+    Command.SWEEP_ERC1155: 40_000,
+    Command.ELEMENT_MARKET: 150_000,
+    Command.SEAPORT_V1_4: 150_000,
+    Command.EXECUTE_SUB_PLAN: 5_000,
+    Command.APPROVE_ERC20: 30_000,
+}
+DEFAULT_EXTRA = {
+    V2_HOP: 60_000,
+    V3_HOP: 70_000,
+    PERMIT: 30_000,
+    BATCH_TRANSFER: 30_000,
+    ALLOW_REVERT: 2_000,
+    UNKNOWN_COMMAND: 50_000,
+}
+
+
+class GasEstimate(NamedTuple):
+    gas: int
+    low: int
+    high: int
+
+
+class Receipt(NamedTuple):
+    commands: bytes
+    inputs: list[bytes]
+    deadline: int | None
+    gas_used: int
+
+
+def _word(data: bytes, offset: int) -> int:
+    return int.from_bytes(data[offset : offset + 32], "big")
+
+
+def _pad(data: bytes) -> bytes:
+    return data + bytes(-len(data) % 32)
+
+
+def _encode_bytes(data: bytes) -> bytes:
+    return len(data).to_bytes(32, "big") + _pad(data)
+
+
+def calldata_gas(commands: bytes, inputs: list[bytes], deadline: int | None = None) -> int:
+    """
+    Intrinsic gas of the `execute` payload, encoded by hand to skip the abi encoder.
+    """
+    head_size = 96 if deadline is not None else 64
+    encoded_inputs = [_encode_bytes(data) for data in inputs]
+    offsets, offset = [], 32 * len(inputs)
+    for data in encoded_inputs:
+        offsets.append(offset.to_bytes(32, "big"))
+        offset += len(data)
+    encoded_commands = _encode_bytes(commands)
+    payload = b"".join(
+        [
+            EXECUTE if deadline is None else EXECUTE_WITH_DEADLINE,
+            head_size.to_bytes(32, "big"),
+            (head_size + len(encoded_commands)).to_bytes(32, "big"),
+            b"" if deadline is None else deadline.to_bytes(32, "big"),
+            encoded_commands,
+            len(inputs).to_bytes(32, "big"),
+            *offsets,
+            *encoded_inputs,
+        ]
+    )
+    zeros = payload.count(0)
+    return zeros * CALLDATA_ZERO_GAS + (len(payload) - zeros) * CALLDATA_NONZERO_GAS
+
+
+def plan_features(commands: bytes, inputs: list[bytes]) -> Counter:
+    """
+    Count commands and the per-hop/permit/revert features of a built plan.
+    Reads the encoded inputs at fixed offsets instead of doing a full abi decode.
+    """
+    features = Counter()
+    for raw, data in zip(commands, inputs):
+        if raw & Command.FLAG_ALLOW_REVERT:
+            features[ALLOW_REVERT] += 1
+        # 0x3f resolves to COMMAND_TYPE_MASK, so go by the cost table rather than the enum
+        command = raw & Command.COMMAND_TYPE_MASK
+        if command not in DEFAULT_BASE:
+            features[UNKNOWN_COMMAND] += 1
+            continue
+        command = Command(command)
+        features[command] += 1
+        match command:
+            case Command.V3_SWAP_EXACT_IN | Command.V3_SWAP_EXACT_OUT:
+                # path is (address, uint24, address, ...), 20 bytes + 23 bytes per hop
+                path_length = _word(data, _word(data, 96))
+                features[V3_HOP] += (path_length - 20) // 23
+            case Command.V2_SWAP_EXACT_IN | Command.V2_SWAP_EXACT_OUT:
+                features[V2_HOP] += _word(data, _word(data, 96)) - 1
+            case Command.PERMIT2_PERMIT:
+                features[PERMIT] += 1
+            case Command.PERMIT2_PERMIT_BATCH:
+                permit_batch = _word(data, 0)
+                features[PERMIT] += _word(data, permit_batch + _word(data, permit_batch))
+            case Command.PERMIT2_TRANSFER_FROM_BATCH:
+                features[BATCH_TRANSFER] += _word(data, _word(data, 0))
+            case Command.EXECUTE_SUB_PLAN:
+                sub_commands, sub_inputs = decode(["bytes", "bytes[]"], data)
+                features += plan_features(sub_commands, list(sub_inputs))
+    return features
+
+
+def decode_execute(calldata: bytes) -> tuple[bytes, list[bytes], int | None]:
+    selector, payload = calldata[:4], calldata[4:]
+    if selector == EXECUTE_WITH_DEADLINE:
+        commands, inputs, deadline = decode(["bytes", "bytes[]", "uint256"], payload)
+        return commands, list(inputs), deadline
+    if selector == EXECUTE:
+        commands, inputs = decode(["bytes", "bytes[]"], payload)
+        return commands, list(inputs), None
+    raise ValueError(f"not an execute call: 0x{selector.hex()}")
+
+
+def _to_int(value: int | str) -> int:
+    return int(value, 16) if isinstance(value, str) else value
+
+
+def load_receipts(path: str | Path) -> list[Receipt]:
+    """
+    Load recorded transactions from a json list of objects with `input` and `gasUsed`,
+    as returned by `eth_getTransactionByHash` and `eth_getTransactionReceipt` respectively.
+    """
+    receipts = []
+    for item in json.loads(Path(path).read_text()):
+        commands, inputs, deadline = decode_execute(bytes.fromhex(item["input"].removeprefix("0x")))
+        receipts.append(Receipt(commands, inputs, deadline, _to_int(item["gasUsed"])))
+    return receipts
+
+
+def _solve(matrix: list[list[float]], vector: list[float]) -> list[float]:
+    # gaussian elimination with partial pivoting, the system is small
+    size = len(vector)
+    rows = [row[:] + [value] for row, value in zip(matrix, vector)]
+    for col in range(size):
+        pivot = max(range(col, size), key=lambda i: abs(rows[i][col]))
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        if abs(rows[col][col]) < 1e-9:
+            raise ValueError("singular system, use strength > 0 or more varied receipts")
+        for i in range(col + 1, size):
+            factor = rows[i][col] / rows[col][col]
+            for j in range(col, size + 1):
+                rows[i][j] -= factor * rows[col][j]
+    solution = [0.0] * size
+    for i in reversed(range(size)):
+        total = sum(rows[i][j] * solution[j] for j in range(i + 1, size))
+        solution[i] = (rows[i][size] - total) / rows[i][i]
+    return solution
+
+
+class GasModel(BaseModel):
+    overhead: int = 10_000
+    base: dict[Command, int] = DEFAULT_BASE
+    extra: dict[str, int] = DEFAULT_EXTRA
+    # relative standard deviation of the estimate
+    error: float = 0.25
+
+    def _known_features(self, features: Counter) -> Counter:
+        # commands missing from a custom cost table are priced as unknown
+        known = Counter()
+        for feature, count in features.items():
+            if isinstance(feature, Command) and feature not in self.base:
+                feature = UNKNOWN_COMMAND
+            known[feature] += count
+        return known
+
+    def execution_gas(self, features: Counter) -> int:
+        gas = self.overhead
+        for feature, count in self._known_features(features).items():
+            if isinstance(feature, Command):
+                gas += self.base[feature] * count
+            else:
+                gas += self.extra[feature] * count
+        return gas
+
+    def estimate(
+        self, commands: bytes, inputs: list[bytes], deadline: int | None = None
+    ) -> GasEstimate:
+        gas = (
+            TX_BASE_GAS
+            + calldata_gas(commands, inputs, deadline)
+            + self.execution_gas(plan_features(commands, inputs))
+        )
+        margin = int(gas * self.error)
+        return GasEstimate(gas, gas - margin, gas + margin)
+
+    def estimate_plan(self, planner: Planner, deadline: int | None = None) -> GasEstimate:
+        commands, inputs = planner.build()
+        return self.estimate(commands, inputs, deadline)
+
+    def calibrate(self, receipts: list[Receipt], strength: float = 1.0) -> "GasModel":
+        """
+        Fit the cost table to recorded receipts with ridge regression towards the current table.
+        `strength` is how many receipts the current table is worth, so features that
+        are absent from the receipts keep their prior cost.
+        """
+        if strength <= 0:
+            raise ValueError("strength must be positive")
+        names = ["overhead", *self.base, *self.extra]
+        prior = [self.overhead, *self.base.values(), *self.extra.values()]
+        size = len(names)
+        matrix = [[strength if i == j else 0.0 for j in range(size)] for i in range(size)]
+        vector = [strength * value for value in prior]
+        samples = []
+        for receipt in receipts:
+            features = self._known_features(plan_features(receipt.commands, receipt.inputs))
+            row = [1.0] + [float(features[name]) for name in names[1:]]
+            target = (
+                receipt.gas_used
+                - TX_BASE_GAS
+                - calldata_gas(receipt.commands, receipt.inputs, receipt.deadline)
+            )
+            samples.append((features, receipt))
+            for i, x in enumerate(row):
+                if x == 0:
+                    continue
+                vector[i] += x * target
+                for j, y in enumerate(row):
+                    matrix[i][j] += x * y
+
+        weights = [round(value) for value in _solve(matrix, vector)]
+        model = GasModel(
+            overhead=weights[0],
+            base=dict(zip(self.base, weights[1 : 1 + len(self.base)])),
+            extra=dict(zip(self.extra, weights[1 + len(self.base) :])),
+            error=self.error,
+        )
+        if samples:
+            errors = []
+            for features, receipt in samples:
+                gas = (
+                    TX_BASE_GAS
+                    + calldata_gas(receipt.commands, receipt.inputs, receipt.deadline)
+                    + model.execution_gas(features)
+                )
+                errors.append((gas - receipt.gas_used) / receipt.gas_used)
+            model.error = (sum(e * e for e in errors) / len(errors)) ** 0.5
+        return model
+
+    @classmethod
+    def from_receipts(cls, path: str | Path, strength: float = 1.0) -> "GasModel":
+        return cls().calibrate(load_receipts(path), strength)
@@ -0,0 +1,145 @@
+from collections.abc import Iterable, Iterator
+from functools import lru_cache
+
+from uniswap.universal_router import Command
+
+# https://github.com/Uniswap/universal-router/blob/main/contracts/UniversalRouter.sol
+EXECUTE_SELECTORS = {
+    bytes.fromhex("3593564c"),  # execute(bytes,bytes[],uint256)
+    bytes.fromhex("24856bc3"),  # execute(bytes,bytes[])
+}
+V2_SWAPS = {Command.V2_SWAP_EXACT_IN, Command.V2_SWAP_EXACT_OUT}
+V3_SWAPS = {Command.V3_SWAP_EXACT_IN, Command.V3_SWAP_EXACT_OUT}
+SWAPS = V2_SWAPS | V3_SWAPS
+
+# byte offsets of the token address and amount word in inputs of static commands
+TOKEN_OFFSETS = {
+    Command.PERMIT2_TRANSFER_FROM: 12,  # (token, recipient, amount)
+    Command.SWEEP: 12,  # (token, recipient, amount_min)
+    Command.TRANSFER: 12,  # (token, recipient, amount)
+    Command.PAY_PORTION: 12,  # (token, recipient, bips)
+    Command.BALANCE_CHECK_ERC20: 44,  # (owner, token, min_balance)
+}
+AMOUNT_OFFSETS = {
+    **dict.fromkeys(SWAPS, 32),  # (recipient, amount, amount_min, path, payer_is_user)
+    Command.PERMIT2_TRANSFER_FROM: 64,
+    Command.SWEEP: 64,
+    Command.TRANSFER: 64,
+    Command.BALANCE_CHECK_ERC20: 64,
+}
+
+
+@lru_cache(maxsize=256)
+def v3_path_offsets(path_length: int) -> tuple[int, ...]:
+    # packed (address, uint24, address, ...) path, a token every 23 bytes
+    return tuple(range(0, path_length - 19, 23))
+
+
+@lru_cache(maxsize=256)
+def v2_path_offsets(path_size: int) -> tuple[int, ...]:
+    # abi encoded address[], right aligned in 32-byte words after the length word
+    return tuple(32 + 32 * i + 12 for i in range(path_size))
+
+
+def _word(view: memoryview, offset: int) -> int:
+    return int.from_bytes(view[offset : offset + 32], "big")
+
+
+def iter_commands(view: memoryview, base: int = 0) -> Iterator[tuple[int, memoryview]]:
+    """
+    Yield (command, input) from abi encoded (bytes commands, bytes[] inputs, ...) at `base`
+    by following the offsets, descending into sub-plans. Nothing is decoded or copied.
+    """
+    commands_start = base + _word(view, base)
+    commands = view[commands_start + 32 : commands_start + 32 + _word(view, commands_start)]
+    inputs_start = base + _word(view, base + 32) + 32
+    if _word(view, inputs_start - 32) != len(commands):
+        return
+    for i, command in enumerate(commands):
+        input_start = inputs_start + _word(view, inputs_start + 32 * i)
+        data = view[input_start + 32 : input_start + 32 + _word(view, input_start)]
+        if command & Command.COMMAND_TYPE_MASK == Command.EXECUTE_SUB_PLAN:
+            yield from iter_commands(data)
+        else:
+            yield command, data
+
+
+class CalldataFilter:
+    """
+    Match router calldata against compiled predicates without an abi decode.
+
+    `commands` is the set of commands of interest, a transaction matches if any of them
+    is present. `tokens` and `min_amount` narrow that down to commands with one of the
+    tokens, in the path for swaps, and an amount of at least `min_amount`.
+    """
+
+    def __init__(
+        self,
+        commands: Iterable[Command] = SWAPS,
+        tokens: Iterable[str] = (),
+        min_amount: int = 0,
+    ):
+        self.commands = frozenset(commands)
+        self.tokens = frozenset(bytes.fromhex(token.removeprefix("0x")) for token in tokens)
+        self.min_amount = min_amount
+        # translation tables that map every command byte, flagged or not, to a match bit.
+        # a sub-plan can hide any command so it has to be inspected too
+        command_types = [byte & Command.COMMAND_TYPE_MASK for byte in range(256)]
+        self._table = bytes(int(command in self.commands) for command in command_types)
+        self._prefilter = bytes(
+            int(command in self.commands or command == Command.EXECUTE_SUB_PLAN)
+            for command in command_types
+        )
+        self._check_inputs = bool(self.tokens) or min_amount > 0
+        if not any(
+            (not self.tokens or command in SWAPS or command in TOKEN_OFFSETS)
+            and (not min_amount or command in AMOUNT_OFFSETS)
+            for command in self.commands
+        ):
+            raise ValueError("no command can match the token and amount predicates")
+
+    def _match_input(self, command: int, data: memoryview) -> bool:
+        command &= Command.COMMAND_TYPE_MASK
+        if command not in self.commands:
+            return False
+        if not self._check_inputs:
+            return True
+        if self.min_amount:
+            if command not in AMOUNT_OFFSETS:
+                return False
+            if _word(data, AMOUNT_OFFSETS[command]) < self.min_amount:
+                return False
+        if not self.tokens:
+            return True
+        if command in TOKEN_OFFSETS:
+            offset = TOKEN_OFFSETS[command]
+            return bytes(data[offset : offset + 20]) in self.tokens
+        if command not in SWAPS:
+            return False
+        path_start = _word(data, 96)
+        if command in V3_SWAPS:
+            path = data[path_start + 32 : path_start + 32 + _word(data, path_start)]
+            offsets = v3_path_offsets(len(path))
+        else:
+            path = data[path_start:]
+            offsets = v2_path_offsets(min(_word(data, path_start), len(path) // 32))
+        return any(bytes(path[offset : offset + 20]) in self.tokens for offset in offsets)
+
+    def match(self, calldata: bytes | memoryview) -> bool:
+        view = memoryview(calldata)
+        if bytes(view[:4]) not in EXECUTE_SELECTORS:
+            return False
+        payload = view[4:]
+        commands_start = _word(payload, 0)
+        commands = bytes(
+            payload[commands_start + 32 : commands_start + 32 + _word(payload, commands_start)]
+        )
+        # cheap rejection on the command string before touching any inputs
+        if not self._check_inputs and 1 in commands.translate(self._table):
+            return True
+        if 1 not in commands.translate(self._prefilter):
+            return False
+        return any(self._match_input(command, data) for command, data in iter_commands(payload))
+
+    def stream(self, transactions: Iterable[bytes | memoryview]) -> Iterator[bytes | memoryview]:
+        return (calldata for calldata in transactions if self.match(calldata))
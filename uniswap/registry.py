@@ -0,0 +1,33 @@
+import json
+from pathlib import Path
+from typing import NamedTuple
+
+from uniswap.universal_router import ADDRESS_THIS, MSG_SENDER, Address
+
+
+class Chain(NamedTuple):
+    """
+    Per-chain constants as pre-encoded addresses, pass them straight to planner helpers.
+    """
+
+    chain_id: int
+    weth: Address
+    permit2: Address
+    router: Address
+    msg_sender: Address = MSG_SENDER
+    address_this: Address = ADDRESS_THIS
+
+
+def load_registry(path: str | Path) -> dict[int, Chain]:
+    """
+    Load a json object of chain id to `weth`, `permit2` and `router` addresses.
+    """
+    registry = {}
+    for chain_id, constants in json.loads(Path(path).read_text()).items():
+        registry[int(chain_id)] = Chain(
+            chain_id=int(chain_id),
+            weth=Address(constants["weth"]),
+            permit2=Address(constants["permit2"]),
+            router=Address(constants["router"]),
+        )
+    return registry
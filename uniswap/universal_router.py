@@ -1,10 +1,15 @@
+from abc import ABC, abstractmethod
 from enum import IntEnum
 from itertools import cycle
+from threading import Lock
 from typing import NamedTuple
 
 from eth_abi import encode
 from eth_abi.packed import encode_packed
-from pydantic import BaseModel, TypeAdapter
+from eth_utils import is_address, to_canonical_address
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, TypeAdapter
+
+from uniswap.cache import LRUCache
 
 
 class Command(IntEnum):
@@ -95,6 +100,28 @@ REVERTIBLE_COMMANDS = {
 }
 
 
+class Address(str):
+    """
+    Address with its abi word precomputed, accepted anywhere a str address is.
+    Static commands built only from these skip the abi encoder.
+    """
+
+    word: bytes
+
+    def __new__(cls, value: str):
+        # same rule as the abi encoder, so an Address is valid exactly when the str is
+        if not isinstance(value, str) or not is_address(value):
+            raise ValueError(f"invalid address {value}")
+        address = super().__new__(cls, value)
+        address.word = bytes(12) + to_canonical_address(value)
+        return address
+
+
+# https://github.com/Uniswap/universal-router/blob/main/contracts/libraries/Constants.sol
+MSG_SENDER = Address("0x0000000000000000000000000000000000000001")
+ADDRESS_THIS = Address("0x0000000000000000000000000000000000000002")
+
+
 # some structs ported from
 # https://github.com/Uniswap/permit2/blob/main/src/interfaces/IAllowanceTransfer.sol#L45
 class PermitDetails(NamedTuple):
@@ -123,7 +150,15 @@ class AllowanceTransferDetails(NamedTuple):
     token: str
 
 
-# use pydantic type adapter to do nested casting so you can pass as dict
+class Plan(NamedTuple):
+    # immutable built plan, ready to be passed to `execute`
+    commands: bytes
+    inputs: tuple[bytes, ...]
+
+
+# use pydantic type adapter to do nested casting so you can pass as dict.
+# the validators are built eagerly at import and are immutable afterwards,
+# so they are safe to call from any number of threads
 permit_batch_adapter = TypeAdapter(PermitBatch)
 permit_single_adapter = TypeAdapter(PermitSingle)
 transfer_from_batch_adapter = TypeAdapter(list[AllowanceTransferDetails])
@@ -134,15 +169,139 @@ def encode_path(path: list) -> bytes:
     return encode_packed(types, path)
 
 
+# commands with only static args, their inputs are a concatenation of abi words
+STATIC_TYPES = {
+    Command.PERMIT2_TRANSFER_FROM: ("address", "address", "uint160"),
+    Command.SWEEP: ("address", "address", "uint256"),
+    Command.TRANSFER: ("address", "address", "uint256"),
+    Command.PAY_PORTION: ("address", "address", "uint256"),
+    Command.WRAP_ETH: ("address", "uint256"),
+    Command.UNWRAP_WETH: ("address", "uint256"),
+    Command.BALANCE_CHECK_ERC20: ("address", "address", "uint256"),
+    Command.CRYPTOPUNKS: ("uint256", "address", "uint256"),
+    Command.OWNER_CHECK_721: ("address", "address", "uint256"),
+    Command.OWNER_CHECK_1155: ("address", "address", "uint256", "uint256"),
+    Command.SWEEP_ERC721: ("address", "address", "uint256"),
+    Command.SWEEP_ERC1155: ("address", "address", "uint256", "uint256"),
+    Command.APPROVE_ERC20: ("address", "uint8"),
+}
+
+
+def encode_static(types: tuple[str, ...], args: tuple) -> bytes | None:
+    # fast path for pre-encoded addresses, returns None to defer to the abi encoder
+    if len(types) != len(args):
+        return None
+    words = []
+    for type, arg in zip(types, args):
+        if type == "address":
+            if not isinstance(arg, Address):
+                return None
+            words.append(arg.word)
+        elif isinstance(arg, int) and not isinstance(arg, bool) and 0 <= arg < 2 ** int(type[4:]):
+            words.append(arg.to_bytes(32, "big"))
+        else:
+            return None
+    return b"".join(words)
+
+
+PERMIT_SINGLE_TYPES = ("address", "uint160", "uint48", "uint48", "address", "uint256")
+
+
+def encode_permit_single(permit_single, data: bytes) -> bytes | None:
+    # the permit is a static tuple, so with pre-encoded addresses only the signature
+    # needs encoding. returns None to defer to the adapter and the abi encoder
+    match permit_single:
+        case {
+            "details": {
+                "token": token,
+                "amount": amount,
+                "expiration": expiration,
+                "nonce": nonce,
+            } as details,
+            "spender": spender,
+            "sigDeadline": sig_deadline,
+        } if len(permit_single) == 3 and len(details) == 4:
+            pass
+        case [[token, amount, expiration, nonce], spender, sig_deadline]:
+            pass
+        case _:
+            return None
+    head = encode_static(
+        PERMIT_SINGLE_TYPES, (token, amount, expiration, nonce, spender, sig_deadline)
+    )
+    if head is None:
+        return None
+    # offset of the signature past the 6 head words and its own offset word
+    return b"".join(
+        [
+            head,
+            (32 * 7).to_bytes(32, "big"),
+            len(data).to_bytes(32, "big"),
+            data,
+            bytes(-len(data) % 32),
+        ]
+    )
+
+
+PERMIT_DETAILS_TYPES = ("address", "uint160", "uint48", "uint48")
+
+
+def encode_permit_batch(permit_batch, data: bytes) -> bytes | None:
+    # same as `encode_permit_single`, only the details array length varies
+    match permit_batch:
+        case {"details": list(details), "spender": spender, "sigDeadline": sig_deadline} if (
+            len(permit_batch) == 3
+        ):
+            pass
+        case [list(details) | tuple(details), spender, sig_deadline]:
+            pass
+        case _:
+            return None
+    words = []
+    for item in details:
+        match item:
+            case {"token": token, "amount": amount, "expiration": expiration, "nonce": nonce} if (
+                len(item) == 4
+            ):
+                pass
+            case [token, amount, expiration, nonce]:
+                pass
+            case _:
+                return None
+        words.append(encode_static(PERMIT_DETAILS_TYPES, (token, amount, expiration, nonce)))
+    words.append(encode_static(("address", "uint256"), (spender, sig_deadline)))
+    if None in words:
+        return None
+    # head of (permit_batch, data), then (details offset, spender, sigDeadline), then details
+    data_offset = 32 * 2 + 32 * 3 + 32 + 32 * 4 * len(details)
+    return b"".join(
+        [
+            (32 * 2).to_bytes(32, "big"),
+            data_offset.to_bytes(32, "big"),
+            (32 * 3).to_bytes(32, "big"),
+            words.pop(),
+            len(details).to_bytes(32, "big"),
+            *words,
+            len(data).to_bytes(32, "big"),
+            data,
+            bytes(-len(data) % 32),
+        ]
+    )
+
+
 def encode_command(command: Command, *args) -> bytes:
     # https://github.com/Uniswap/universal-router/blob/main/contracts/base/Dispatcher.sol#L41
+    # pure function of its args, safe to call concurrently
+    types = STATIC_TYPES.get(command)
+    if types is not None and (encoded := encode_static(types, args)) is not None:
+        return encoded
+
     match command, args:
         case Command.V3_SWAP_EXACT_IN | Command.V3_SWAP_EXACT_OUT, [
             str(recipient),
             int(amount),
             int(amount_min),
-            list(path)
-            | bytes(path),
+            list(path) | bytes(path),
             bool(payer_is_user),
         ]:
             if isinstance(path, list):
@@ -163,22 +322,22 @@ def encode_command(command: Command, *args) -> bytes:
                 [batch_details],
             )
         case Command.PERMIT2_PERMIT, [
-            dict(permit_single)
-            | list(permit_single)
-            | tuple(permit_single),
+            dict(permit_single) | list(permit_single) | tuple(permit_single),
             bytes(data),
         ]:
+            if (encoded := encode_permit_single(permit_single, data)) is not None:
+                return encoded
             permit_single = permit_single_adapter.validate_python(permit_single)
             return encode(
                 ["((address,uint160,uint48,uint48),address,uint256)", "bytes"],  # noqa: E501
                 [permit_single, data],
             )
         case Command.PERMIT2_PERMIT_BATCH, [
-            dict(permit_batch)
-            | list(permit_batch)
-            | tuple(permit_batch),
+            dict(permit_batch) | list(permit_batch) | tuple(permit_batch),
             bytes(data),
         ]:
+            if (encoded := encode_permit_batch(permit_batch, data)) is not None:
+                return encoded
             permit_batch = permit_batch_adapter.validate_python(permit_batch)
             return encode(
                 ["((address,uint160,uint48,uint48)[],address,uint256)", "bytes"],  # noqa: E501
@@ -301,28 +460,26 @@ def encode_command(command: Command, *args) -> bytes:
             raise NotImplementedError("unknown command or param types")
 
 
-class Planner(BaseModel):
-    commands: list[Command] = []
-    inputs: list[list] = []
+def freeze_args(value):
+    # hashable cache key for command args, every value is tagged with its exact type
+    # so `True` or `1.0` doesn't collide with `1` and a list doesn't collide with a tuple.
+    # a cache hit must never accept args the encoder would reject
+    match value:
+        case list() | tuple():
+            return type(value), *map(freeze_args, value)
+        case dict():
+            return dict, *((key, freeze_args(item)) for key, item in value.items())
+        case _:
+            return type(value), value
 
-    def add(self, command: Command, *args, allow_revert=False):
-        if allow_revert:
-            if command not in REVERTIBLE_COMMANDS:
-                raise ValueError(f"{command.name} cannot be allowed to revert")
-            command |= Command.FLAG_ALLOW_REVERT
 
-        # check it's encodeable
-        encode_command(command, *args)
-        self.commands.append(command)
-        self.inputs.append(args)
-        return self
+class PlannerCommands(ABC):
+    """
+    Typed helpers for every command, shared by the planners which implement `add`.
+    """
 
-    def build(self) -> tuple[bytes, list[bytes]]:
-        commands = bytes(self.commands)
-        inputs = [
-            encode_command(command, *args) for command, args in zip(self.commands, self.inputs)
-        ]
-        return commands, inputs
+    @abstractmethod
+    def add(self, command: Command, *args, allow_revert=False): ...
 
     def v3_swap_exact_in(
         self,
@@ -497,3 +654,82 @@ class Planner(BaseModel):
 
     def approve_erc20(self, token: str, spender: int):
         self.add(Command.APPROVE_ERC20, token, spender)
+
+
+class Planner(PlannerCommands, BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    commands: list[Command] = []
+    inputs: list[list] = []
+    # optional cache of encoded inputs and built plans, can be shared between planners
+    cache: LRUCache | None = Field(default=None, exclude=True, repr=False)
+    # guards commands and inputs so a planner can be shared between threads
+    _lock: Lock = PrivateAttr(default_factory=Lock)
+
+    # locks can't be copied or pickled, copies get a fresh one
+    def __copy__(self):
+        planner = super().__copy__()
+        planner._lock = Lock()
+        return planner
+
+    def __deepcopy__(self, memo=None):
+        memo = {} if memo is None else memo
+        memo[id(self._lock)] = Lock()
+        return super().__deepcopy__(memo)
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        private = state["__pydantic_private__"]
+        state["__pydantic_private__"] = {k: v for k, v in private.items() if k != "_lock"}
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._lock = Lock()
+
+    def _encode(self, command: Command, args) -> bytes:
+        command &= Command.COMMAND_TYPE_MASK
+        if self.cache is None:
+            return encode_command(command, *args)
+        try:
+            key = command, freeze_args(args)
+            hash(key)
+        except TypeError:
+            return encode_command(command, *args)
+        return self.cache.get(key, lambda: encode_command(command, *args))
+
+    def _build(self, commands: list[Command], inputs: list[list]) -> tuple[bytes, list[bytes]]:
+        return bytes(commands), [
+            self._encode(command, args) for command, args in zip(commands, inputs)
+        ]
+
+    def add(self, command: Command, *args, allow_revert=False):
+        if allow_revert:
+            if command not in REVERTIBLE_COMMANDS:
+                raise ValueError(f"{command.name} cannot be allowed to revert")
+            command |= Command.FLAG_ALLOW_REVERT
+
+        # check it's encodeable
+        self._encode(command, args)
+        with self._lock:
+            self.commands.append(command)
+            self.inputs.append(args)
+        return self
+
+    def build(self) -> tuple[bytes, list[bytes]]:
+        # encode a snapshot so concurrent `add` calls don't tear the plan
+        with self._lock:
+            commands, inputs = list(self.commands), list(self.inputs)
+        if self.cache is None:
+            return self._build(commands, inputs)
+        try:
+            key = bytes(commands), freeze_args(inputs)
+            hash(key)
+        except TypeError:
+            return self._build(commands, inputs)
+        commands, inputs = self.cache.get(key, lambda: self._build(commands, inputs))
+        return commands, list(inputs)
+
+    def freeze(self) -> Plan:
+        commands, inputs = self.build()
+        return Plan(commands, tuple(inputs))